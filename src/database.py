@@ -7,18 +7,16 @@ This module defines the database setup, including:
 - Initialization functions to create the necessary tables.
 """
 
-from databases import Database
-from sqlalchemy import Column, Integer, String
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+import os
+
+from sqlalchemy import Column, Integer, String, event
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 # Database URL for SQLite with aiosqlite driver
 DATABASE_URL = "sqlite+aiosqlite:///./test.db"
 
-# Initialize the Database object for asynchronous operations
-database = Database(DATABASE_URL)
-
 # Base class for declarative class definitions
 Base = declarative_base()
 
@@ -38,15 +36,38 @@ class URL(Base):
     short_url = Column(String, unique=True, index=True)
 
 
-# Create an asynchronous engine
-async_engine = create_async_engine(DATABASE_URL, echo=True, future=True)
+# Core table for queries that don't need the ORM
+url_table = URL.__table__
 
-# Create a configured "AsyncSession" class
-AsyncSessionLocal = sessionmaker(
-    bind=async_engine, class_=AsyncSession, expire_on_commit=False
+
+# Create an asynchronous engine backed by a pool of warm connections
+async_engine = create_async_engine(
+    DATABASE_URL,
+    echo=os.getenv("SQL_ECHO") == "1",
+    future=True,
+    poolclass=AsyncAdaptedQueuePool,
+    pool_size=5,
+    max_overflow=5,
+    connect_args={"check_same_thread": False},
 )
 
 
+@event.listens_for(async_engine.sync_engine, "connect")
+def set_sqlite_pragma(dbapi_connection, _):
+    """
+    Applies SQLite PRAGMA tuning on every new connection.
+
+    WAL journaling with synchronous=NORMAL reduces the number of fsyncs
+    per commit and lets readers proceed while a write is in progress.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA cache_size=-64000")
+    cursor.close()
+
+
 async def init_db():
     """
     Initializes the database by creating tables if they don't exist.
@@ -10,28 +10,30 @@ It also includes:
 - Utility functions for URL encoding and decoding.
 """
 
+import asyncio
 import hashlib
 import logging
 import os
 import string
+from bisect import bisect_right
 from contextlib import asynccontextmanager
+from functools import lru_cache
 
-from databases import Database
+from cachetools import LRUCache
 from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.responses import HTMLResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
 from sqlalchemy.future import select
 from starlette.responses import JSONResponse
 
-from src.database import AsyncSessionLocal, init_db
-from src.database import DATABASE_URL, URL
+from src.database import async_engine, init_db, url_table
 from src.models import URLModel, ShortURLModel
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging; per-request messages are only emitted at DEBUG
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
 logger = logging.getLogger(__name__)
 
 
@@ -43,8 +45,9 @@ async def lifespan(app: FastAPI):   # pragma: no cover
 
     This context manager handles the startup and shutdown events
     for the FastAPI application.
-    During startup, it initializes the database.
-    During shutdown, it disconnects from the database.
+    During startup, it initializes the database and starts
+    the batched encode writer.
+    During shutdown, it stops the writer and disposes of the database engine.
 
     Args:
         app (FastAPI): The FastAPI application instance.
@@ -54,9 +57,11 @@ async def lifespan(app: FastAPI):   # pragma: no cover
     """
     # Startup event
     await init_db()
+    encode_batcher.start()
     yield
     # Shutdown event
-    await database.disconnect()
+    await encode_batcher.stop()
+    await async_engine.dispose()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -64,8 +69,11 @@ app = FastAPI(lifespan=lifespan)
 static_directory = os.path.join(os.path.dirname(__file__), "static")
 app.mount("/static", StaticFiles(directory=static_directory), name="static")
 
-# Set up templates
-templates = Jinja2Templates(directory="src/templates")
+# Set up templates; the index page is compiled once and never reloaded
+templates_directory = os.path.join(os.path.dirname(__file__), "templates")
+templates = Jinja2Templates(directory=templates_directory)
+templates.env.auto_reload = False
+index_template = templates.get_template("index.html")
 
 
 @app.get("/", response_class=HTMLResponse)
@@ -74,150 +82,298 @@ async def read_root(request: Request):  # pragma: no cover
     Handle the root URL endpoint.
 
     This function serves the main page of the URL shortener application.
-    It uses FastAPI's TemplateResponse to render the "index.html" template
-    and return it as an HTML response.
+    It renders the precompiled "index.html" template, which only needs
+    the request to resolve static file URLs, and returns it as HTML.
 
     Args:
         request (Request): The request object containing
         metadata about the request.
 
     Returns:
-        TemplateResponse: The HTML response with
+        HTMLResponse: The HTML response with
         the rendered "index.html" template.
     """
-    return templates.TemplateResponse("index.html", {"request": request})
+    return HTMLResponse(index_template.render({"request": request}))
 
 
 # Base62 character set
 BASE62 = string.digits + string.ascii_letters
-
-# Initialize the async engine and database
-async_engine = create_async_engine(DATABASE_URL, echo=True, future=True)
-database = Database(DATABASE_URL)   # pragma: no cover
+BASE62_SET = frozenset(BASE62)
+# Prefix and maximum code length of every shortened URL
+SHORT_PREFIX = "http://short.est/"
+SHORT_URL_LENGTH = 6
+# Short code -> original URL; rows are never updated, so entries stay valid
+decode_cache: LRUCache = LRUCache(maxsize=10_000)
+# Powers of 62 used to locate the leading Base62 digits of a hash
+BASE62_POWERS = tuple(62 ** exp for exp in range(23))
 
 
 async def get_db():     # pragma: no cover
     """
-    Dependency to get a database session.
+    Dependency to get a pooled database connection.
     """
-    async with AsyncSessionLocal() as session:
-        yield session
+    async with async_engine.connect() as conn:
+        yield conn
 
 
-@app.on_event("startup")
-async def startup():    # pragma: no cover
+class EncodeBatcher:
     """
-    Event triggered at application startup.
-    Initializes the database.
+    Coalesces concurrent encode requests into batched database writes.
+
+    Requests are queued together with a future; a single background task
+    drains up to ``batch_size`` items at a time, inserts them with one
+    statement and one commit, and resolves each future with the stored
+    short URL.
     """
-    await init_db()
+
+    def __init__(self, engine: AsyncEngine, batch_size: int = 64):
+        self.engine = engine
+        self.batch_size = batch_size
+        self._queue = None
+        self._task = None
+
+    def start(self):
+        """
+        Starts the background writer on the running event loop.
+        """
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        Stops accepting URLs, writes everything already queued and
+        then cancels the background writer.
+        """
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        try:
+            if not task.done():
+                await self._queue.join()
+        finally:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            # Fail anything the writer did not get to
+            leftover = []
+            while not self._queue.empty():
+                leftover.append(self._queue.get_nowait())
+            self._fail(leftover)
+
+    async def submit(self, original_url: str, short_url: str) -> str:
+        """
+        Queues a URL for insertion and waits until it has been written.
+
+        :param original_url: Original URL.
+        :param short_url: Short URL generated for the original URL.
+        :return: Short URL stored for the original URL.
+        :raises RuntimeError: If the batcher is not running.
+        """
+        if self._task is None:
+            raise RuntimeError("Encode batcher is not running")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((original_url, short_url, future))
+        return await future
+
+    async def _run(self):
+        """
+        Drains the queue in batches for as long as the writer is running.
+        """
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                await self._process(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _process(self, batch):
+        """
+        Writes a batch and resolves the future of every item in it.
+
+        :param batch: List of (original_url, short_url, future) tuples.
+        """
+        try:
+            stored = await self._write_batch(batch)
+        except asyncio.CancelledError:
+            self._fail(batch)
+            raise
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            self._fail(batch, e)
+            return
+        for original_url, _, future in batch:
+            if future.done():
+                continue
+            if original_url in stored:
+                future.set_result(stored[original_url])
+            else:
+                future.set_exception(RuntimeError(
+                    f"Short URL collision for {original_url}"))
+
+    @staticmethod
+    def _fail(batch, error: Exception = None):
+        """
+        Fails every pending future in a batch.
+
+        :param batch: List of (original_url, short_url, future) tuples.
+        :param error: Exception to set, defaults to a stopped-batcher error.
+        """
+        for _, _, future in batch:
+            if not future.done():
+                future.set_exception(
+                    error or RuntimeError("Encode batcher was stopped"))
+
+    async def _write_batch(self, batch) -> dict:
+        """
+        Inserts a batch of URLs in a single transaction.
+
+        :param batch: List of (original_url, short_url, future) tuples.
+        :return: Mapping of original URL to its stored short URL.
+        """
+        async with self.engine.begin() as conn:
+            await conn.execute(
+                insert(url_table).on_conflict_do_nothing(),
+                [{"original_url": original_url, "short_url": short_url}
+                 for original_url, short_url, _ in batch]
+            )
+            result = await conn.execute(
+                select(url_table.c.original_url, url_table.c.short_url).where(
+                    url_table.c.original_url.in_({item[0] for item in batch}))
+            )
+            return dict(result.all())
+
+
+encode_batcher = EncodeBatcher(async_engine)
+
+
+def get_encode_batcher() -> EncodeBatcher:
+    """
+    Dependency to get the batcher that writes encoded URLs.
+    """
+    return encode_batcher
 
 
-def encode_base62(num: int) -> str:     # pragma: no cover
+def encode_base62(num: int, length: int = 6) -> str:     # pragma: no cover
     """
-    Encodes an integer to a Base62 string.
+    Encodes the leading digits of an integer to a Base62 string.
 
-    :param num: Integer to encode.
+    Only the ``length`` most significant digits are converted, which gives
+    the same result as truncating the full Base62 representation without
+    looping over every digit of a 128-bit hash.
+
+    :param num: Integer to encode, smaller than 62 ** 22.
+    :param length: Maximum number of Base62 digits to return.
     :return: Encoded string in Base62 format.
     """
     if num == 0:
         return BASE62[0]
-    base62 = []
-    while num:
+    digits = bisect_right(BASE62_POWERS, num)
+    if digits > length:
+        num //= BASE62_POWERS[digits - length]
+        digits = length
+    base62 = [""] * digits
+    for i in range(digits - 1, -1, -1):
         num, rem = divmod(num, 62)
-        base62.append(BASE62[rem])
-    return ''.join(reversed(base62))
+        base62[i] = BASE62[rem]
+    return ''.join(base62)
 
 
+@lru_cache(maxsize=8192)
 def generate_short_url(original_url: str) -> str:   # pragma: no cover
     """
     Generates a short URL from the original URL using Base62 encoding.
+    Results are memoized since the same URL always maps to the same hash.
 
     :param original_url: Original URL.
     :return: Shortened URL in Base62 format.
     """
-    url_hash = hashlib.md5(original_url.encode()).hexdigest()
-    hash_int = int(url_hash, 16)
-    short_url = encode_base62(hash_int)
-    return short_url[:6]
+    digest = hashlib.blake2b(original_url.encode(), digest_size=8).digest()
+    return encode_base62(int.from_bytes(digest, "big"), SHORT_URL_LENGTH)
 
 
 @app.post("/api/v1/encode/", response_model=ShortURLModel)
-async def encode_url(url: URLModel, db: AsyncSession = Depends(get_db)):
+async def encode_url(url: URLModel,
+                     batcher: EncodeBatcher = Depends(get_encode_batcher)):
     """
     Endpoint to encode an original URL to a shortened URL.
 
     :param url: URLModel object containing the original URL.
-    :param db: Database session.
+    :param batcher: Batcher that writes the URL to the database.
     :return: ShortURLModel object containing the shortened URL.
     """
     original_url = url.original_url.strip('/')
-    logger.info("Received URL to encode: %s", original_url)
+    logger.debug("Received URL to encode: %s", original_url)
     try:
-        # Check if the original URL already exists in the database
-        result = await db.execute(select(URL).filter(
-            URL.original_url == original_url)
-        )
-        existing_url = result.scalars().first()
-        if existing_url:
-            logger.info("URL already exists: %s", existing_url.short_url)
-            return ShortURLModel(
-                short_url=f"http://short.est/{existing_url.short_url}"
-            )
-
-        # Generate short URL if it does not exist
         short_url = generate_short_url(original_url)
-        logger.info("Generated short URL: %s", short_url)
-        db_url = URL(original_url=original_url, short_url=short_url)
-        db.add(db_url)
-        await db.commit()
-        await db.refresh(db_url)
-        logger.info("URL successfully encoded and stored: %s", db_url.id)
-        return ShortURLModel(short_url=f"http://short.est/{short_url}")
+        logger.debug("Generated short URL: %s", short_url)
+
+        # Queue the URL for the next batched write and await its result
+        stored_short_url = await batcher.submit(original_url, short_url)
+        decode_cache[stored_short_url] = original_url
+        logger.debug("URL successfully encoded and stored: %s",
+                     stored_short_url)
+        return ShortURLModel(short_url=SHORT_PREFIX + stored_short_url)
     except Exception as e:
-        logger.error("Error encoding URL: %s", str(e))
+        logger.error("Error encoding URL: %s", e)
         raise HTTPException(status_code=500, detail=str(e)) from e
 
 
 @app.post("/api/v1/decode/", response_model=URLModel)
 async def decode_url(short_url: ShortURLModel,
-                     db: AsyncSession = Depends(get_db)):
+                     db: AsyncConnection = Depends(get_db)):
     """
     Endpoint to decode a shortened URL to its original URL.
 
     :param short_url: ShortURLModel object containing the shortened URL.
-    :param db: Database session.
+    :param db: Database connection.
     :return: URLModel object containing the original URL.
     """
     short_url = short_url.short_url.strip('/')
-    logger.info("Received short URL to decode: %s", short_url)
+    logger.debug("Received short URL to decode: %s", short_url)
     try:
         # Validate that the short URL matches the expected format
-        if not short_url.startswith("http://short.est/"):
+        if not short_url.startswith(SHORT_PREFIX):
             logger.warning("Invalid short URL format: %s. "
-                           "The URL must start with http://short.est/.",
-                           short_url)
+                           "The URL must start with %s.",
+                           short_url, SHORT_PREFIX)
             raise HTTPException(
                 status_code=400,
                 detail="Invalid short URL format. "
-                       "The URL must start with http://short.est/.")
+                       f"The URL must start with {SHORT_PREFIX}.")
+
+        # Extract and validate the Base62 part from the shortened URL
+        url_id_str = short_url[len(SHORT_PREFIX):]
+        if not (0 < len(url_id_str) <= SHORT_URL_LENGTH
+                and BASE62_SET.issuperset(url_id_str)):
+            logger.warning("Invalid short URL code: %s", short_url)
+            raise HTTPException(
+                status_code=400,
+                detail="Invalid short URL format. The code must be up to "
+                       f"{SHORT_URL_LENGTH} Base62 characters.")
 
-        # Extract the Base62 part from the shortened URL
-        url_id_str = short_url.split('/')[-1]
+        cached_url = decode_cache.get(url_id_str)
+        if cached_url is not None:
+            return URLModel(original_url=cached_url)
 
         # Check if the shortened URL exists in the database
-        query = select(URL).where(URL.short_url == url_id_str)
+        query = select(url_table.c.original_url).where(
+            url_table.c.short_url == url_id_str)
         result = await db.execute(query)
-        db_url = result.scalars().first()
+        original_url = result.scalar_one_or_none()
 
-        if db_url is None:
+        if original_url is None:
             logger.warning("Short URL not found: %s", short_url)
             raise HTTPException(status_code=404, detail="Short URL not found")
 
-        logger.info("Short URL decoded successfully: %s", db_url.original_url)
-        return URLModel(original_url=db_url.original_url)
+        decode_cache[url_id_str] = original_url
+        logger.debug("Short URL decoded successfully: %s", original_url)
+        return URLModel(original_url=original_url)
     except HTTPException as http_exc:
         raise http_exc  # Re-raise HTTP exceptions without modification
     except Exception as e:
-        logger.error("Error decoding URL: %s", str(e))
+        logger.error("Error decoding URL: %s", e)
         raise HTTPException(status_code=500, detail=str(e)) from e
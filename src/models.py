@@ -7,7 +7,7 @@ request and response validation:
 - ShortURLModel: Model for the shortened URL.
 """
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 
 class URLModel(BaseModel):
@@ -17,6 +17,8 @@ class URLModel(BaseModel):
     Attributes:
         original_url (str): The original URL provided by the user.
     """
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
     original_url: str
 
 
@@ -27,4 +29,6 @@ class ShortURLModel(BaseModel):
     Attributes:
         short_url (str): The shortened URL generated by the application.
     """
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
     short_url: str
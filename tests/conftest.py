@@ -1,34 +1,53 @@
 """
 This module sets up the test configuration for the FastAPI application,
-including the creation of a test database and providing a session for testing.
+including the creation of a test database and providing a client for testing.
 """
 import collections
 import os
 import sys
 
 import pytest
-from fastapi.testclient import TestClient
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
+import pytest_asyncio
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
 
 from src.database import Base
-from src.main import app
-from src.main import get_db
+from src.main import app, EncodeBatcher
+from src.main import get_db, get_encode_batcher
 
 # Add the src directory to sys.path
 sys.path.append(os.path.abspath(
     os.path.join(os.path.dirname(__file__), '..', 'src')
 ))
 
-SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///./test.db"
+# Shared in-memory database; StaticPool keeps a single connection open so
+# every session sees the same data without touching the disk. That one
+# connection is shared by decode reads and batched encode writes, and
+# returning a read connection to the pool rolls it back, so tests must not
+# decode while an encode batch is still being written.
+SQLALCHEMY_DATABASE_URL = (
+    "sqlite+aiosqlite:///file::memory:?cache=shared&uri=true"
+)
 
-engine = create_async_engine(SQLALCHEMY_DATABASE_URL, echo=True)
-TestingSessionLocal = sessionmaker(
-    bind=engine, class_=AsyncSession, expire_on_commit=False
+engine = create_async_engine(
+    SQLALCHEMY_DATABASE_URL,
+    echo=False,
+    connect_args={"uri": True},
+    poolclass=StaticPool,
 )
+test_encode_batcher = EncodeBatcher(engine)
+
+
+async def override_get_db():
+    """
+    Provides a connection to the in-memory test database.
+    """
+    async with engine.connect() as conn:
+        yield conn
 
 
-@pytest.fixture(scope="module", autouse=True)
+@pytest_asyncio.fixture(scope="module", autouse=True)
 async def init_test_db():
     """
     Initializes the test database and creates the required tables.
@@ -36,23 +55,32 @@ async def init_test_db():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
     yield
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.drop_all)
 
 
 @pytest.fixture(scope="module")
-async def db_session(init_test_db):
+def db_engine(init_test_db):
     """
-    Provides a new database session for each test.
+    Provides the engine of the initialized in-memory test database.
     """
-    async with TestingSessionLocal() as session:
-        yield session
+    return engine
 
 
-@pytest.fixture(scope="module")
-def client():
+@pytest_asyncio.fixture(scope="module")
+async def ac(init_test_db):
     """
-    Provides a test client for making requests to the FastAPI application.
+    Provides an async client shared by all tests in a module,
+    with the endpoints routed to the in-memory test database.
+
+    Decode and encode share the engine's single connection, so tests
+    must await encodes before decoding rather than running them
+    concurrently.
     """
-    with TestClient(app) as c:
-        yield c
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_encode_batcher] = lambda: test_encode_batcher
+    test_encode_batcher.start()
+    try:
+        async with AsyncClient(app=app, base_url="http://test") as c:
+            yield c
+    finally:
+        await test_encode_batcher.stop()
+        app.dependency_overrides.clear()
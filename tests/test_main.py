@@ -11,77 +11,170 @@ The tests cover various scenarios including:
 - Handling non-existent shortened URLs.
 """
 
+import asyncio
+
 import pytest
-from httpx import AsyncClient
+
+from src.main import EncodeBatcher, decode_cache, generate_short_url
 
 
-@pytest.mark.asyncio
-async def test_encode_url(client):
+@pytest.mark.asyncio(scope="module")
+async def test_encode_url(ac):
     """
     Test the /api/v1/encode/ endpoint for encoding a URL to a shortened URL.
     """
-    async with AsyncClient(app=client.app, base_url="http://test") as ac:
-        response = await ac.post(
-            "/api/v1/encode/",
-            json={"original_url": "https://www.markant.com/en/"}
-        )
+    response = await ac.post(
+        "/api/v1/encode/",
+        json={"original_url": "https://www.markant.com/en/"}
+    )
     assert response.status_code == 200
     data = response.json()
     assert "short_url" in data
     assert data["short_url"].startswith("http://short.est/")
-    assert data["short_url"] == "http://short.est/5FYwyk"
+    assert data["short_url"] == "http://short.est/3xfJcP"
 
 
-@pytest.mark.asyncio
-async def test_decode_url(client):
+@pytest.mark.asyncio(scope="module")
+async def test_encode_concurrent_urls(ac):
+    """
+    Test that concurrent requests to the /api/v1/encode/ endpoint,
+    which are written in a single batch, each get their own short URL.
+    """
+    urls = [f"https://www.markant.com/en/page-{i}" for i in range(10)]
+    responses = await asyncio.gather(*(
+        ac.post("/api/v1/encode/", json={"original_url": url})
+        for url in urls + urls
+    ))
+    assert all(response.status_code == 200 for response in responses)
+    short_urls = [response.json()["short_url"] for response in responses]
+    assert short_urls[:len(urls)] == short_urls[len(urls):]
+    assert len(set(short_urls)) == len(urls)
+
+
+@pytest.mark.asyncio(scope="module")
+async def test_encode_batcher_stop_drains_queue(db_engine):
+    """
+    Test that stopping the encode batcher writes every queued URL
+    and that it rejects URLs submitted after it was stopped.
+    """
+    batcher = EncodeBatcher(db_engine, batch_size=8)
+    batcher.start()
+    urls = [f"https://www.markant.com/en/stop-{i}" for i in range(50)]
+    submits = [
+        asyncio.create_task(batcher.submit(url, generate_short_url(url)))
+        for url in urls
+    ]
+    await asyncio.sleep(0)
+    await batcher.stop()
+    results = await asyncio.wait_for(asyncio.gather(*submits), timeout=2)
+    assert results == [generate_short_url(url) for url in urls]
+    with pytest.raises(RuntimeError):
+        await batcher.submit(urls[0], generate_short_url(urls[0]))
+
+
+@pytest.mark.asyncio(scope="module")
+async def test_decode_url(ac):
     """
     Test the /api/v1/decode/ endpoint for decoding
     a shortened URL back to the original URL.
     """
-    async with AsyncClient(app=client.app, base_url="http://test") as ac:
-        # First, encode a URL to get a shortened URL
-        encode_response = await ac.post(
-            "/api/v1/encode/",
-            json={"original_url": "https://www.markant.com/en/"}
-        )
-        assert encode_response.status_code == 200
-        short_url = encode_response.json()["short_url"]
+    # First, encode a URL to get a shortened URL
+    encode_response = await ac.post(
+        "/api/v1/encode/",
+        json={"original_url": "https://www.markant.com/en/"}
+    )
+    assert encode_response.status_code == 200
+    short_url = encode_response.json()["short_url"]
+
+    # Now, decode the shortened URL from the database
+    decode_cache.clear()
+    decode_response = await ac.post(
+        "/api/v1/decode/",
+        json={"short_url": short_url}
+    )
+    assert decode_response.status_code == 200
+    decoded_url = decode_response.json()["original_url"]
+    assert decoded_url == "https://www.markant.com/en"
 
-        # Now, decode the shortened URL
-        decode_response = await ac.post(
-            "/api/v1/decode/",
-            json={"short_url": short_url}
-        )
-        assert decode_response.status_code == 200
-        decoded_url = decode_response.json()["original_url"]
-        assert decoded_url == "https://www.markant.com/en"
+
+@pytest.mark.asyncio(scope="module")
+async def test_decode_url_cache(ac):
+    """
+    Test that encoding and decoding from the database fill the decode cache
+    and that later decodes of the same short URL are served from it.
+    """
+    original_url = "https://www.markant.com/en/cache"
+    encode_response = await ac.post(
+        "/api/v1/encode/",
+        json={"original_url": original_url}
+    )
+    assert encode_response.status_code == 200
+    short_url = encode_response.json()["short_url"]
+    url_id_str = short_url.rsplit("/", 1)[-1]
+    assert decode_cache[url_id_str] == original_url
+
+    # A decode served from the database fills the cache
+    decode_cache.clear()
+    decode_response = await ac.post(
+        "/api/v1/decode/",
+        json={"short_url": short_url}
+    )
+    assert decode_response.status_code == 200
+    assert decode_response.json()["original_url"] == original_url
+    assert decode_cache[url_id_str] == original_url
+
+    # The next decode is answered from the cache, not the database
+    decode_cache[url_id_str] = "https://www.markant.com/en/cached"
+    decode_response = await ac.post(
+        "/api/v1/decode/",
+        json={"short_url": short_url}
+    )
+    assert decode_response.status_code == 200
+    assert decode_response.json()["original_url"] == \
+        "https://www.markant.com/en/cached"
 
 
-@pytest.mark.asyncio
-async def test_decode_invalid_format_url(client):
+@pytest.mark.asyncio(scope="module")
+async def test_decode_invalid_format_url(ac):
     """
     Test the /api/v1/decode/ endpoint with an invalid URL format.
     """
-    async with AsyncClient(app=client.app, base_url="http://test") as ac:
-        response = await ac.post(
-            "/api/v1/decode/",
-            json={"short_url": "http://invalid.url/abc123"}
-        )
+    response = await ac.post(
+        "/api/v1/decode/",
+        json={"short_url": "http://invalid.url/abc123"}
+    )
     assert response.status_code == 400
     assert response.json() == {
         "detail": "Invalid short URL format. "
                   "The URL must start with http://short.est/."}
 
 
-@pytest.mark.asyncio
-async def test_decode_nonexistent_url(client):
+@pytest.mark.asyncio(scope="module")
+async def test_decode_nonexistent_url(ac):
     """
     Test the /api/v1/decode/ endpoint with a non-existent shortened URL.
     """
-    async with AsyncClient(app=client.app, base_url="http://test") as ac:
+    response = await ac.post(
+        "/api/v1/decode/",
+        json={"short_url": "http://short.est/zzzzzz"}
+    )
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Short URL not found"}
+
+
+@pytest.mark.asyncio(scope="module")
+async def test_decode_invalid_code_url(ac):
+    """
+    Test the /api/v1/decode/ endpoint with a short URL code
+    that is too long or contains non-Base62 characters.
+    """
+    for short_url in ("http://short.est/nonexistent",
+                      "http://short.est/ab-c12"):
         response = await ac.post(
             "/api/v1/decode/",
-            json={"short_url": "http://short.est/nonexistent"}
+            json={"short_url": short_url}
         )
-    assert response.status_code == 404
-    assert response.json() == {"detail": "Short URL not found"}
+        assert response.status_code == 400
+        assert response.json() == {
+            "detail": "Invalid short URL format. "
+                      "The code must be up to 6 Base62 characters."}